@@ -7,7 +7,14 @@ BASE_DIR = Path(__file__).resolve().parents[1]
 DATA_DIR = BASE_DIR / "data"
 RAW_JSON = DATA_DIR / "movies_raw.json"
 TRANSFORMED_CSV = DATA_DIR / "movies_transformed.csv"
+TRANSFORMED_PARQUET = DATA_DIR / "movies_transformed.parquet"
 KPI_CSV = DATA_DIR / "movie_kpis.csv"
+KPI_PARQUET = DATA_DIR / "movie_kpis.parquet"
+CACHE_DIR = DATA_DIR / "cache"
+ANALYTICS_CACHE_DIR = CACHE_DIR / "analytics"
+
+# Figure output (headless pipeline runs)
+FIGURES_DIR = BASE_DIR / "figures"
 
 # Log paths
 LOG_DIR = BASE_DIR / "Logs"
@@ -1,15 +1,21 @@
 import os
 import time
+import atexit
 import logging
 import json
+import threading
+from logging.handlers import MemoryHandler
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from typing import List, Dict, Optional
 
+import orjson
 import requests
 import pandas as pd
 from dotenv import load_dotenv
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
-from Config.paths import RAW_JSON,FETCH_LOG
+from Config.paths import RAW_JSON, FETCH_LOG, CACHE_DIR
 
 
 # Environment & Config
@@ -33,6 +39,9 @@ MOVIE_IDS = [
 REQUEST_TIMEOUT = 5  # seconds
 MAX_RETRIES = 3
 RETRY_BACKOFF = 1.5  # exponential backoff base
+MAX_WORKERS = 8  # concurrent requests in flight
+CACHE_EXPIRY = 86400  # seconds a cached response stays fresh
+RATE_LIMIT = 30  # requests per second (TMDb allows ~40)
 
 
 
@@ -49,13 +58,24 @@ os.makedirs(LOG_DIR, exist_ok=True)
 
 # logger = logging.getLogger("tmdb_fetcher")
 
-logging.basicConfig(
-    filename=FETCH_LOG,
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s"
-)
-
 logger = logging.getLogger("tmdb_fetcher")
+logger.setLevel(logging.INFO)
+
+# Buffer records in memory and write them in batches; errors flush at once
+if not logger.handlers:
+    file_handler = logging.FileHandler(FETCH_LOG, encoding="utf-8")
+    file_handler.setFormatter(
+        logging.Formatter("%(asctime)s | %(levelname)s | %(message)s")
+    )
+    memory_handler = MemoryHandler(
+        capacity=1024,
+        flushLevel=logging.ERROR,
+        target=file_handler
+    )
+    logger.addHandler(memory_handler)
+    atexit.register(memory_handler.flush)
+
+logger.propagate = False
 
 # HTTP Session with Retries
 
@@ -71,7 +91,10 @@ def create_session() -> requests.Session:
         raise_on_status=False
     )
 
-    adapter = HTTPAdapter(max_retries=retry_strategy)
+    adapter = HTTPAdapter(
+        max_retries=retry_strategy,
+        pool_maxsize=MAX_WORKERS
+    )
 
     session = requests.Session()
     session.mount("https://", adapter)
@@ -81,6 +104,70 @@ def create_session() -> requests.Session:
 
 
 
+# Rate Limiting
+
+class RateLimiter:
+    
+    #Thread-safe token bucket: allows bursts up to `rate` requests, then
+    #refills at `rate` tokens per second.
+    
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.rate,
+                    self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+
+                wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+
+rate_limiter = RateLimiter(RATE_LIMIT)
+
+
+
+# On-disk Response Cache
+
+def load_cached_movie(movie_id: int) -> Optional[Dict]:
+    
+    #Return the cached record for movie_id, or None if missing or expired.
+    
+    cache_path = CACHE_DIR / f"{movie_id}.json"
+    try:
+        if time.time() - cache_path.stat().st_mtime > CACHE_EXPIRY:
+            return None
+        return orjson.loads(cache_path.read_bytes())
+    except (OSError, orjson.JSONDecodeError):
+        return None
+
+
+def cache_movie(movie_id: int, movie: Dict) -> None:
+    
+    #Store a fetched record so reruns skip the network. Failures are non-fatal.
+    
+    cache_path = CACHE_DIR / f"{movie_id}.json"
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_path.write_bytes(orjson.dumps(movie))
+    except (OSError, TypeError) as e:
+        logger.warning("Could not cache movie_id=%s: %s", movie_id, e)
+
+
+
 # Fetch Single Movie
 
 def fetch_movie(
@@ -91,30 +178,37 @@ def fetch_movie(
     #Fetch a single movie from TMDb. Returns None for invalid or failed IDs.
   
     if movie_id <= 0:
-        logger.warning(f"Skipping invalid movie_id: {movie_id}")
+        logger.warning("Skipping invalid movie_id: %s", movie_id)
         return None
 
+    cached = load_cached_movie(movie_id)
+    if cached is not None:
+        logger.info("Loaded movie_id=%s from cache", movie_id)
+        return cached
+
     url = f"{BASE_URL}/movie/{movie_id}"
     params = {"api_key": API_KEY, "append_to_response": "credits"}
 
     try:
+        rate_limiter.acquire()
         response = session.get(url, params=params, timeout=REQUEST_TIMEOUT)
 
         if response.status_code == 404:
-            logger.warning(f"Movie not found (404): {movie_id}")
+            logger.warning("Movie not found (404): %s", movie_id)
             return None
 
         if response.status_code != 200:
             logger.error(
-                f"Failed to fetch movie_id={movie_id} "
-                f"status={response.status_code}"
+                "Failed to fetch movie_id=%s status=%s",
+                movie_id,
+                response.status_code
             )
             return None
 
-        data = response.json()
+        data = orjson.loads(response.content)
 
-        logger.info(f"Successfully fetched movie_id={movie_id}")
-        return {
+        logger.info("Successfully fetched movie_id=%s", movie_id)
+        movie = {
             "movie_id": data.get("id"),
             "title": data.get("title"),
             "tagline": data.get("tagline"),
@@ -136,12 +230,15 @@ def fetch_movie(
             "credits": data.get("credits")
         }
 
+        cache_movie(movie_id, movie)
+        return movie
+
     except requests.exceptions.Timeout:
-        logger.error(f"Timeout while fetching movie_id={movie_id}")
+        logger.error("Timeout while fetching movie_id=%s", movie_id)
     except requests.exceptions.RequestException as e:
-        logger.exception(f"Request error for movie_id={movie_id}: {e}")
+        logger.exception("Request error for movie_id=%s: %s", movie_id, e)
     except Exception as e:
-        logger.exception(f"Unexpected error for movie_id={movie_id}: {e}")
+        logger.exception("Unexpected error for movie_id=%s: %s", movie_id, e)
 
     return None
 
@@ -152,28 +249,48 @@ def fetch_movie(
 def fetch_movies(movie_ids: List[int]) -> pd.DataFrame:
     
     #Fetch multiple movies (including full credits)and return as Pandas DataFrame.
+    # Requests are I/O-bound, so they run concurrently on a shared session;
+    # 429 responses are retried by the session's Retry (honours Retry-After).
     
     session = create_session()
-    results = []
-
-    for movie_id in movie_ids:
-        movie = fetch_movie(session, movie_id)
-        if movie:
-            results.append(movie)
 
-        time.sleep(0.2)
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        movies = executor.map(
+            lambda movie_id: fetch_movie(session, movie_id),
+            movie_ids
+        )
+        results = [movie for movie in movies if movie]
 
-    wanted_movie = pd.DataFrame(results)
+    # Pivot records into columns (first-seen key order) so the frame is
+    # built from aligned lists instead of reconciling one dict per row
+    keys = dict.fromkeys(key for movie in results for key in movie)
+    columns = {key: [movie.get(key) for movie in results] for key in keys}
+    wanted_movie = pd.DataFrame(columns)
 
     logger.info(
-        f"Fetch completed | requested={len(movie_ids)} "
-        f"successful={len(wanted_movie)}"
+        "Fetch completed | requested=%d successful=%d",
+        len(movie_ids),
+        len(wanted_movie)
     )
 
     return wanted_movie
 
 
 
+# Persist Raw Movies
+
+def save_raw_movies(movies: pd.DataFrame, path: Path = RAW_JSON) -> None:
+    
+    #Serialize records with orjson (C-backed) and write them in one call.
+    
+    payload = orjson.dumps(
+        movies.to_dict(orient="records"),
+        option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY
+    )
+    Path(path).write_bytes(payload)
+
+
+
 # Main Execution
 
 if __name__ == "__main__":
@@ -183,5 +300,6 @@ if __name__ == "__main__":
     # df_movies.to_json("movies_raw.json", orient="records", indent=4)
 
     # logger.info("Movie data saved to movies_raw.json")
-    df_movies.to_json(RAW_JSON, orient="records", indent=4)
-logger.info(f"Movie data saved to {RAW_JSON}")
+    save_raw_movies(df_movies, RAW_JSON)
+    logger.info("Movie data saved to %s", RAW_JSON)
+
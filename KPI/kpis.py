@@ -1,7 +1,12 @@
+import atexit
 import logging
+import numpy as np
 import pandas as pd
 import os
-from Config.paths import DATA_DIR, TRANSFORMED_CSV, KPI_CSV,LOG_DIR, KPI_LOG
+from logging.handlers import MemoryHandler
+from typing import Dict, List, Optional
+from Transformation.storage import load_transformed
+from Config.paths import DATA_DIR, TRANSFORMED_CSV, TRANSFORMED_PARQUET, KPI_CSV, KPI_PARQUET, LOG_DIR, KPI_LOG
 # Logging
 
 
@@ -24,7 +29,14 @@ if not logger.handlers:
         "%(asctime)s | %(levelname)s | %(name)s | %(message)s"
     )
      file_handler.setFormatter(formatter)
-     logger.addHandler(file_handler)
+     # Buffer records in memory and write them in batches; errors flush at once
+     memory_handler = MemoryHandler(
+        capacity=1024,
+        flushLevel=logging.ERROR,
+        target=file_handler
+    )
+     logger.addHandler(memory_handler)
+     atexit.register(memory_handler.flush)
 
 # Prevent logs going to root logger / console
 logger.propagate = False
@@ -81,23 +93,65 @@ KPI_DEFINITIONS = {
     }
 }
 
-def get_movie_kpi(df: pd.DataFrame, kpi_name: str) -> pd.DataFrame:
+def column_array(
+    df: pd.DataFrame,
+    col: str,
+    cache: Optional[Dict[str, np.ndarray]] = None
+) -> np.ndarray:
 
-    #Compute a single movie KPI and return the result as a DataFrame.
+    #Return a column as a float64 ndarray (NaN for missing). With a cache
+    #dict, each column is converted once and reused by later callers.
+
+    if cache is not None and col in cache:
+        return cache[col]
+
+    values = df[col].to_numpy(dtype="float64", na_value=np.nan)
+    if cache is not None:
+        cache[col] = values
+    return values
 
 
-    logger.info(f"Computing KPI: {kpi_name}")
+def get_kpi_group_records(
+    df: pd.DataFrame,
+    kpi_names: List[str],
+    mask: Optional[pd.Series] = None,
+    arrays: Optional[Dict[str, np.ndarray]] = None,
+    titles: Optional[np.ndarray] = None
+) -> Dict[str, Dict]:
 
-    if kpi_name not in KPI_DEFINITIONS:
-        logger.error(f"KPI '{kpi_name}' is not defined")
-        raise ValueError(f"Unknown KPI: {kpi_name}")
+    #Compute KPIs that share a column and filter, scanning the column once.
+    #Returns {kpi_name: {KPI, Movie, Value}}; an optional precomputed boolean
+    #mask (Series or ndarray) replaces the group's own filter, and an arrays
+    #cache (see column_array) shares column buffers across groups; titles,
+    #if given, is the title column as an ndarray.
 
-    config = KPI_DEFINITIONS[kpi_name]
+    for kpi_name in kpi_names:
+        logger.info("Computing KPI: %s", kpi_name)
+
+        if kpi_name not in KPI_DEFINITIONS:
+            logger.error("KPI '%s' is not defined", kpi_name)
+            raise ValueError(f"Unknown KPI: {kpi_name}")
+
+    config = KPI_DEFINITIONS[kpi_names[0]]
     col = config["column"]
-    agg = config["agg"]
     filter_col = config.get("filter_col")
     filter_val = config.get("filter_val")
 
+    # All KPIs must share the column and filter the group is computed on
+    group = (col, filter_col, filter_val)
+    for kpi_name in kpi_names[1:]:
+        other = KPI_DEFINITIONS[kpi_name]
+        key = (other["column"], other.get("filter_col"), other.get("filter_val"))
+        if key != group:
+            logger.error(
+                "KPI '%s' does not share column/filter with '%s'",
+                kpi_name,
+                kpi_names[0]
+            )
+            raise ValueError(
+                f"KPIs {kpi_names} do not share a column and filter"
+            )
+
     # Validate required columns
     required_cols = ["title", col]
     if filter_col:
@@ -105,58 +159,136 @@ def get_movie_kpi(df: pd.DataFrame, kpi_name: str) -> pd.DataFrame:
 
     missing = [c for c in required_cols if c not in df.columns]
     if missing:
-        logger.error(f"Missing columns for KPI '{kpi_name}': {missing}")
+        logger.error("Missing columns for KPIs %s: %s", kpi_names, missing)
         raise ValueError(f"Missing columns: {missing}")
 
-    temp = df.copy()
+    # Raw float64 buffer: reductions run on the ndarray, NaN marks missing
+    series = df[col]
+    values = column_array(df, col, arrays)
 
-    # Apply filter if needed
+    # Apply filter if needed: rows failing it become NaN in the buffer, so
+    # no filtered frame or Series is built (unknown filter values fail)
     if filter_col:
-        temp = temp[temp[filter_col] >= filter_val]
+        if mask is None:
+            mask = column_array(df, filter_col, arrays) >= filter_val
+        if isinstance(mask, pd.Series):
+            keep = mask.to_numpy(dtype=bool, na_value=False)
+        else:
+            keep = mask
+        values = np.where(keep, values, np.nan)
         logger.info(
-            f"Applied filter: {filter_col} >= {filter_val} "
-            f"(remaining rows: {len(temp)})"
+            "Applied filter: %s >= %s (remaining rows: %d)",
+            filter_col,
+            filter_val,
+            keep.sum()
         )
 
-    if temp.empty:
-        logger.warning(f"No data after filtering for KPI '{kpi_name}'")
-        return pd.DataFrame([{
+    if np.isnan(values).all():
+        for kpi_name in kpi_names:
+            logger.warning("No data after filtering for KPI '%s'", kpi_name)
+        return {
+            kpi_name: {"KPI": kpi_name, "Movie": None, "Value": None}
+            for kpi_name in kpi_names
+        }
+
+    # Each reduction runs at most once per group, returning a position
+    aggs = {KPI_DEFINITIONS[kpi_name]["agg"] for kpi_name in kpi_names}
+    pos = {}
+    if "max" in aggs:
+        pos["max"] = int(np.nanargmax(values))
+    if "min" in aggs:
+        pos["min"] = int(np.nanargmin(values))
+
+    # Titles as a plain ndarray; callers may pass one shared across groups
+    if titles is None:
+        titles = df["title"].to_numpy()
+
+    results = {}
+    for kpi_name in kpi_names:
+        i = pos[KPI_DEFINITIONS[kpi_name]["agg"]]
+        result = {
             "KPI": kpi_name,
-            "Movie": None,
-            "Value": None
-        }])
+            "Movie": titles[i],
+            "Value": series.iat[i]
+        }
 
-    idx = temp[col].idxmax() if agg == "max" else temp[col].idxmin()
+        logger.info(
+            "KPI '%s' result: %s (%s)",
+            kpi_name,
+            result["Movie"],
+            result["Value"]
+        )
+        results[kpi_name] = result
 
-    result = pd.DataFrame([{
-        "KPI": kpi_name,
-        "Movie": temp.loc[idx, "title"],
-        "Value": temp.loc[idx, col]
-    }])
+    return results
 
-    logger.info(
-        f"KPI '{kpi_name}' result: "
-        f"{result.iloc[0]['Movie']} ({result.iloc[0]['Value']})"
-    )
 
-    return result
+def get_movie_kpi_record(
+    df: pd.DataFrame,
+    kpi_name: str,
+    mask: Optional[pd.Series] = None
+) -> Dict:
+
+    #Compute a single movie KPI and return it as a {KPI, Movie, Value} record.
+
+    return get_kpi_group_records(df, [kpi_name], mask)[kpi_name]
+
+
+def get_movie_kpi(
+    df: pd.DataFrame,
+    kpi_name: str,
+    mask: Optional[pd.Series] = None
+) -> pd.DataFrame:
+
+    #Compute a single movie KPI and return the result as a DataFrame.
+
+    return pd.DataFrame([get_movie_kpi_record(df, kpi_name, mask)])
 
 
 def compute_all_kpis(df: pd.DataFrame) -> pd.DataFrame:
    
-    logger.info(f"Computing all KPIs for {len(df)} movies")
+    logger.info("Computing all KPIs for %d movies", len(df))
     
-    results = []
-    for kpi_name in KPI_DEFINITIONS.keys():
+    # Group KPIs on the same column and filter (e.g. highest/lowest ROI)
+    # so max and min come from a single pass over that column
+    groups = {}
+    for kpi_name, config in KPI_DEFINITIONS.items():
+        key = (config["column"], config.get("filter_col"), config.get("filter_val"))
+        groups.setdefault(key, []).append(kpi_name)
+
+    # Convert each column to an ndarray once: filter columns such as
+    # budget_musd_num and vote_count are also KPI columns of their own
+    arrays = {}
+
+    # Title lookups share one ndarray too (kept apart from the float64
+    # buffers in arrays)
+    titles = df["title"].to_numpy() if "title" in df.columns else None
+
+    # Build each distinct filter mask once, on first use, and share it
+    # across groups (NaN compares False, so unknown filter values fail the
+    # filter). Built inside the guarded call so a bad filter column only
+    # skips the KPIs that use it.
+    masks = {}
+
+    results = {}
+    for (_, filter_col, filter_val), kpi_names in groups.items():
         try:
-            result = get_movie_kpi(df, kpi_name)
-            results.append(result)
+            key = (filter_col, filter_val)
+            if filter_col and filter_col in df.columns and key not in masks:
+                masks[key] = column_array(df, filter_col, arrays) >= filter_val
+            mask = masks.get(key)
+            results.update(
+                get_kpi_group_records(df, kpi_names, mask, arrays, titles)
+            )
         except Exception as e:
-            logger.error(f"Failed to compute KPI '{kpi_name}': {e}")
+            logger.error("Failed to compute KPIs %s: %s", kpi_names, e)
+
+    # Keep the KPI_DEFINITIONS order in the output
+    records = [results[name] for name in KPI_DEFINITIONS if name in results]
     
-    if results:
-        all_results = pd.concat(results, ignore_index=True)
-        logger.info(f"Computed {len(all_results)} KPIs successfully")
+    if records:
+        all_results = pd.DataFrame.from_records(records)
+        logger.info("Computed %d KPIs successfully", len(all_results))
         return all_results
     else:
         logger.error("No KPIs were computed successfully")
@@ -169,10 +301,10 @@ def compute_all_kpis(df: pd.DataFrame) -> pd.DataFrame:
 if __name__ == "__main__":
     # Load transformed movie data
     try:
-      movies_df = pd.read_csv(TRANSFORMED_CSV)
-      logger.info(f"Loaded {len(movies_df)} movies from movies_transformed.csv")
+      movies_df = load_transformed(TRANSFORMED_PARQUET, TRANSFORMED_CSV)
+      logger.info("Loaded %d transformed movies", len(movies_df))
     except FileNotFoundError:
-        logger.error("Transformed csv not found. Run transform.py first.")
+        logger.error("Transformed data not found. Run transform.py first.")
         exit(1)
     
     # Compute all KPIs
@@ -180,9 +312,10 @@ if __name__ == "__main__":
     
     if not kpi_results.empty:
         # Save KPI results
+        kpi_results.to_parquet(KPI_PARQUET, engine="pyarrow", index=False)
         kpi_results.to_csv(KPI_CSV, index=False)
 
-        logger.info("KPI results saved to movie_kpis.csv")
+        logger.info("KPI results saved to movie_kpis.parquet and movie_kpis.csv")
         
     else:
         logger.error("No KPI results to save")
\ No newline at end of file
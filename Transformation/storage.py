@@ -0,0 +1,59 @@
+import pandas as pd
+from Config.paths import TRANSFORMED_CSV, TRANSFORMED_PARQUET
+
+# Readers for the transformed movie data. Kept free of logging setup and
+# other import-time side effects so the KPI and visualization steps can
+# load the data without importing the transform module.
+
+
+# Column dtypes of movies_transformed.csv, so reads skip type inference.
+# Integer columns use nullable Int32/Int16 because a CSV blank cannot be int.
+TRANSFORMED_SCHEMA = {
+    "movie_id": "Int32",
+    "title": "str",
+    "tagline": "str",
+    "genres": "str",
+    "belongs_to_collection": "str",
+    "original_language": "category",
+    "budget_musd": "str",
+    "revenue_musd": "str",
+    "budget_musd_num": "float64",
+    "revenue_musd_num": "float64",
+    "profit_musd": "float64",
+    "roi": "float64",
+    "production_companies": "str",
+    "production_countries": "str",
+    "vote_count": "Int32",
+    "vote_average": "float64",
+    "popularity": "float64",
+    "runtime": "Int16",
+    "overview": "str",
+    "spoken_languages": "str",
+    "poster_path": "str",
+    "cast": "str",
+    "cast_size": "Int32",
+    "director": "str",
+    "crew_size": "Int32"
+}
+
+
+def read_transformed_csv(path=TRANSFORMED_CSV) -> pd.DataFrame:
+    # Read the transformed CSV with a pinned schema and ISO release dates.
+    return pd.read_csv(
+        path,
+        dtype=TRANSFORMED_SCHEMA,
+        parse_dates=["release_date"],
+        date_format="%Y-%m-%d"
+    )
+
+
+def load_transformed(
+    parquet_path=TRANSFORMED_PARQUET,
+    csv_path=TRANSFORMED_CSV
+) -> pd.DataFrame:
+    # Typed Parquet first; the CSV (read with TRANSFORMED_SCHEMA) is the
+    # fallback. Raises FileNotFoundError when neither exists.
+    try:
+        return pd.read_parquet(parquet_path, engine="pyarrow")
+    except FileNotFoundError:
+        return read_transformed_csv(csv_path)
@@ -1,15 +1,26 @@
 import os
 import logging
 from xml.sax import handler
+from pathlib import Path
+import numpy as np
+import orjson
 import pandas as pd
-from Config.paths import TRANSFORM_LOG, RAW_JSON, TRANSFORMED_CSV
+from pandas.api.types import is_numeric_dtype
+from Config.paths import TRANSFORM_LOG, RAW_JSON, TRANSFORMED_CSV, TRANSFORMED_PARQUET
+# Re-exported: readers of the transformed output live in a module without
+# logging side effects, so KPI/visualization code can import them cheaply
+from Transformation.storage import (
+    TRANSFORMED_SCHEMA, read_transformed_csv, load_transformed
+)
 
 
 
 # Logging Configuration
 
+import atexit
 import logging
 import os
+from logging.handlers import MemoryHandler
 from Config.paths import TRANSFORM_LOG
 
 # Ensure log directory exists
@@ -35,8 +46,15 @@ formatter = logging.Formatter(
 
 file_handler.setFormatter(formatter)
 
-# Attach handler
-logger.addHandler(file_handler)
+# Attach handler behind a memory buffer: records are written in batches,
+# and anything at ERROR or above flushes the buffer immediately
+memory_handler = MemoryHandler(
+    capacity=1024,
+    flushLevel=logging.ERROR,
+    target=file_handler
+)
+logger.addHandler(memory_handler)
+atexit.register(memory_handler.flush)
 
 # Stop propagation to root logger
 logger.propagate = False
@@ -48,77 +66,120 @@ logger.propagate = False
 # Helper Functions
 
 
-def extract_credits(credits: dict) -> pd.Series:
-    # Extract cast, director, and crew stats from credits JSON.
-    if not isinstance(credits, dict):
-        credits = {}
-
-    cast = credits.get("cast", [])
-    crew = credits.get("crew", [])
-
-    director = next(
-        (p.get("name") for p in crew if p.get("job") == "Director"),
-        None
+def join_names(items) -> str:
+    # 'name|name|name' from a list of dicts; entries without a string name
+    # are skipped (str.join would raise on None).
+    names = []
+    for item in items:
+        if type(item) is dict:
+            name = item.get("name")
+            if type(name) is str:
+                names.append(name)
+    return "|".join(names)
+
+
+def extract_credits_columns(credits) -> tuple:
+    # Extract cast, cast_size, director and crew_size lists from a column
+    # of credits JSON in one pass (no per-row pd.Series). Outputs are
+    # preallocated: object slots for the strings, int32 arrays for counts.
+    DIRECTOR = "Director"
+    n = len(credits)
+    casts = [None] * n
+    directors = [None] * n
+    cast_sizes = np.empty(n, dtype=np.int32)
+    crew_sizes = np.empty(n, dtype=np.int32)
+
+    for i, c in enumerate(credits):
+        if type(c) is not dict:
+            c = {}
+
+        cast = c.get("cast") or []
+        crew = c.get("crew") or []
+
+        casts[i] = join_names(cast)
+        cast_sizes[i] = len(cast)
+        crew_sizes[i] = len(crew)
+
+        # First crew member credited as Director
+        for p in crew:
+            if type(p) is dict and p.get("job") == DIRECTOR:
+                directors[i] = p.get("name")
+                break
+
+    return casts, cast_sizes, directors, crew_sizes
+
+
+def flatten_named_column(values) -> list:
+    #  Flattens:dict -> value['name']  to list[dict] -> 'name|name|name'
+    # One pass over the column's object array instead of Series.apply.
+    _dict = dict
+    _list = list
+    _get = dict.get
+    _na = pd.NA
+    out = []
+    append = out.append
+    for value in values:
+        kind = type(value)
+        if kind is _dict:
+            append(_get(value, "name"))
+        elif kind is _list:
+            append(join_names(value))
+        else:
+            append(_na)
+    return out
+
+
+
+def format_musd(values: pd.Series) -> pd.Series:
+    # Vectorized "$123.4M" formatting of a million-USD column; NA stays NA.
+    # "%.1f" rounds like f"{x:.1f}" (58.85 -> 58.9), unlike Series.round.
+    arr = values.to_numpy(dtype="float64", na_value=np.nan)
+    formatted = pd.Series(
+        np.char.add(np.char.add("$", np.char.mod("%.1f", arr)), "M"),
+        index=values.index,
+        dtype="string"
     )
-
-    return pd.Series({
-        "cast": "|".join(
-            p.get("name") for p in cast if isinstance(p, dict)
-        ),
-        "cast_size": len(cast),
-        "director": director,
-        "crew_size": len(crew)
-    })
-
-
-def flatten_named_json(value):
-   #  Flattens:dict -> value['name']  to list[dict] -> 'name|name|name'
-    
-    if isinstance(value, dict):
-        return value.get("name")
-    if isinstance(value, list):
-        return "|".join(
-            item.get("name") for item in value if isinstance(item, dict)
-        )
-    return pd.NA
-
+    return formatted.where(values.notna(), pd.NA)
 
 
 # Main Transform Function
 
+# Arrow-backed string dtype for flattened JSON names
+ARROW_STR = pd.StringDtype("pyarrow", na_value=np.nan)
+
 def transform_movies(raw_movies: pd.DataFrame) -> pd.DataFrame:
     logger.info("Starting movie transformation")
 
-    wanted_data = raw_movies.copy()
-    logger.info(f"Initial rows: {len(wanted_data)}")
+    logger.info("Initial rows: %d", len(raw_movies))
+
+    # Membership tests below go against hashed snapshots of the column
+    # labels, refreshed only where columns are added or removed
+    raw_columns = frozenset(raw_movies.columns)
 
     
     # Credits Extraction 
+    # Read straight from the raw frame so credits can go out with the
+    # noise columns in a single drop below.
 
-    if "credits" in wanted_data.columns:
+    credits_columns = {}
+    if "credits" in raw_columns:
         logger.info("Extracting credits data")
-        credits_df = wanted_data["credits"].apply(extract_credits)
-        wanted_data = pd.concat([wanted_data, credits_df], axis=1)
+        cast, cast_size, director, crew_size = extract_credits_columns(
+            raw_movies["credits"].to_numpy(dtype=object)
+        )
+        # Counts as nullable Int32, the dtype TRANSFORMED_SCHEMA reads back
+        credits_columns = {
+            "cast": cast,
+            "cast_size": pd.array(cast_size, dtype="Int32"),
+            "director": director,
+            "crew_size": pd.array(crew_size, dtype="Int32")
+        }
     else:
         logger.warning("credits column missing")
 
     
-    # Flatten JSON-like Columns
-    json_columns = [
-        "belongs_to_collection",
-        "genres",
-        "production_companies",
-        "production_countries",
-        "spoken_languages"
-    ]
-
-    for col in json_columns:
-        if col in wanted_data.columns:
-            logger.info(f"Flattening column: {col}")
-            wanted_data[col] = wanted_data[col].apply(flatten_named_json)
-
-    
     # Drop Irrelevant / Noisy Columns
+    # Done early so later passes touch fewer columns.
     
     drop_columns = [
         "adult",
@@ -126,68 +187,132 @@ def transform_movies(raw_movies: pd.DataFrame) -> pd.DataFrame:
         "original_title",
         "video",
         "homepage",
-        "credits",
-        "status"
+        "status",
+        "credits"
     ]
 
-    existing = [c for c in drop_columns if c in wanted_data.columns]
-    wanted_data.drop(columns=existing, inplace=True)
+    existing = [c for c in drop_columns if c in raw_columns]
+    wanted_data = raw_movies.drop(columns=existing).assign(**credits_columns)
+
+    logger.info("Dropped columns: %s", existing)
+
+    
+    # Flatten JSON-like Columns
+    json_columns = [
+        "belongs_to_collection",
+        "genres",
+        "production_companies",
+        "production_countries",
+        "spoken_languages"
+    ]
 
-    logger.info(f"Dropped columns: {existing}")
+    # All five share the {"name": ...} schema: flatten each object array
+    # and attach the results with a single assign
+    columns = frozenset(wanted_data.columns)
+    present = [c for c in json_columns if c in columns]
+
+    # Flattened names are stored Arrow-backed (NaN for missing, the same
+    # dtype as pandas 3's default "str"), never as Python objects
+    logger.info("Flattening columns: %s", present)
+    wanted_data = wanted_data.assign(**{
+        col: pd.array(
+            flatten_named_column(wanted_data[col].to_numpy(dtype=object)),
+            dtype=ARROW_STR
+        )
+        for col in present
+    })
 
     
     # Type Conversions
 
-    numeric_cols = ["budget", "revenue", "id", "popularity", "vote_count"]
+    numeric_cols = ["budget", "revenue", "id", "popularity"]
 
+    # Clean API payloads are already numeric; only parse (and coerce bad
+    # values to NaN) when a column arrives as strings/objects
     for col in numeric_cols:
-        if col in wanted_data.columns:
+        if col in columns and not is_numeric_dtype(wanted_data[col]):
             wanted_data[col] = pd.to_numeric(wanted_data[col], errors="coerce")
 
-    if "release_date" in wanted_data.columns:
+    # Counts and ids fit in int32/int16. Widths are fixed (not inferred from
+    # the data) so Parquet and CSV loads always agree with TRANSFORMED_SCHEMA;
+    # float columns stay float64 so KPI values keep full precision
+    integer_cols = {"movie_id": "Int32", "vote_count": "Int32", "runtime": "Int16"}
+
+    for col, dtype in integer_cols.items():
+        if col in columns:
+            wanted_data[col] = pd.to_numeric(
+                wanted_data[col], errors="coerce"
+            ).astype(dtype)
+
+    # TMDB dates are ISO YYYY-MM-DD: a fixed format keeps parsing on the
+    # fast path, and cache=True parses each distinct date string once
+    if "release_date" in columns:
         wanted_data["release_date"] = pd.to_datetime(
-            wanted_data["release_date"], errors="coerce"
+            wanted_data["release_date"],
+            format="%Y-%m-%d",
+            errors="coerce",
+            cache=True
         )
 
-    
-    # Handle Invalid 
-    
-    wanted_data.loc[wanted_data["budget"] == 0, "budget"] = pd.NA
-    wanted_data.loc[wanted_data["revenue"] == 0, "revenue"] = pd.NA
+    # Low-cardinality labels: store as integer codes instead of strings
+    category_cols = ["original_language"]
 
+    for col in category_cols:
+        if col in columns:
+            wanted_data[col] = wanted_data[col].astype("category")
 
-    # Financial Analytics
     
-    wanted_data["budget_musd_num"] = wanted_data["budget"] / 1_000_000
-    wanted_data["revenue_musd_num"] = wanted_data["revenue"] / 1_000_000
-
-    wanted_data["profit_musd"] = (
-        wanted_data["revenue_musd_num"] - wanted_data["budget_musd_num"]
+    # Handle Invalid 
+    
+    # Zero budget/revenue means "unknown": mask both columns in one pass
+    money_cols = ["budget", "revenue"]
+    wanted_data[money_cols] = wanted_data[money_cols].mask(
+        wanted_data[money_cols] == 0
     )
 
-    wanted_data["roi"] = (
-        wanted_data["profit_musd"] / wanted_data["budget_musd_num"]
-    ).replace([float("inf"), -float("inf")], pd.NA)
 
+    # Financial Analytics
     
-    # Presentation Columns
-    
-    wanted_data["budget_musd"] = wanted_data["budget_musd_num"].apply(
-        lambda x: f"${x:.1f}M" if pd.notna(x) else pd.NA
+    # One NumPy pass over budget/revenue; zero budgets yield NaN ROI, not inf
+    budget = wanted_data["budget"].to_numpy(dtype="float64", na_value=np.nan)
+    revenue = wanted_data["revenue"].to_numpy(dtype="float64", na_value=np.nan)
+
+    budget_musd = budget / 1_000_000
+    revenue_musd = revenue / 1_000_000
+    profit_musd = revenue_musd - budget_musd
+    roi = np.divide(
+        profit_musd,
+        budget_musd,
+        out=np.full_like(profit_musd, np.nan),
+        where=budget_musd != 0
     )
 
-    wanted_data["revenue_musd"] = wanted_data["revenue_musd_num"].apply(
-        lambda x: f"${x:.1f}M" if pd.notna(x) else pd.NA
+    wanted_data = wanted_data.assign(
+        budget_musd_num=budget_musd,
+        revenue_musd_num=revenue_musd,
+        profit_musd=profit_musd,
+        roi=roi
     )
 
     
     # Data Quality Filters
     
-    wanted_data.drop_duplicates(subset=["movie_id"], inplace=True)
-    wanted_data.dropna(subset=["movie_id", "title"], inplace=True)
-
-    # Keep rows with at least 10 non-null fields
-    wanted_data = wanted_data[wanted_data.notna().sum(axis=1) >= 10]
+    # One mask, one selection: first occurrence of each movie_id, with an id
+    # and a title, and at least 10 non-null fields
+    # (applied together with the column selection below).
+    # budget_musd/revenue_musd are only built by write_transformed but still
+    # count as fields; each is non-null exactly when its _num column is.
+    non_null = (
+        wanted_data.count(axis=1)
+        + wanted_data["budget_musd_num"].notna()
+        + wanted_data["revenue_musd_num"].notna()
+    )
+    keep = (
+        ~wanted_data["movie_id"].duplicated()
+        & wanted_data["movie_id"].notna()
+        & wanted_data["title"].notna()
+        & (non_null >= 10)
+    )
     
     # Column Ordering (Guaranteed)
     
@@ -199,8 +324,6 @@ def transform_movies(raw_movies: pd.DataFrame) -> pd.DataFrame:
         "genres",
         "belongs_to_collection",
         "original_language",
-        "budget_musd",
-        "revenue_musd",
         "budget_musd_num",
         "revenue_musd_num",
         "profit_musd",
@@ -220,31 +343,72 @@ def transform_movies(raw_movies: pd.DataFrame) -> pd.DataFrame:
         "crew_size"
     ]
 
-    missing = set(final_columns) - set(wanted_data.columns)
+    columns = frozenset(wanted_data.columns)
+    missing = set(final_columns) - columns
     if missing:
-        logger.warning(f"Missing expected columns: {missing}")
+        logger.warning("Missing expected columns: %s", missing)
 
-    wanted_data = wanted_data[[c for c in final_columns if c in wanted_data.columns]]
-    wanted_data.reset_index(drop=True, inplace=True)
+    # Rows and columns are taken in one selection, so the output is
+    # copied once
+    selected = [c for c in final_columns if c in columns]
+    wanted_data = wanted_data.loc[keep, selected].reset_index(drop=True)
 
-    logger.info(f"Transformation complete | final rows: {len(wanted_data)}")
-    logger.info(f"Final columns: {wanted_data.columns.tolist()}")
+    logger.info("Transformation complete | final rows: %d", len(wanted_data))
+    logger.info("Final columns: %s", wanted_data.columns.tolist())
     return wanted_data
 
 
 
+# Persistence
+
+def load_raw_movies(path=RAW_JSON) -> pd.DataFrame:
+    # Parse the raw dump with orjson (C-backed) and build the frame from
+    # records, leaving the nested credits/genres payloads as plain objects.
+    records = orjson.loads(Path(path).read_bytes())
+    return pd.DataFrame.from_records(records)
+
+
+def write_transformed(df: pd.DataFrame, path) -> None:
+    # The "$123.4M" presentation columns are derived only when writing CSV;
+    # Parquet keeps just the numeric columns.
+    path = Path(path)
+
+    if path.suffix == ".parquet":
+        df.to_parquet(path, engine="pyarrow", compression="zstd", index=False)
+        return
+
+    presentation = df.assign(
+        budget_musd=format_musd(df["budget_musd_num"]),
+        revenue_musd=format_musd(df["revenue_musd_num"])
+    )
+
+    # Keep the CSV layout: presentation columns follow original_language
+    columns = df.columns.tolist()
+    at = len(columns)
+    if "original_language" in columns:
+        at = columns.index("original_language") + 1
+    columns[at:at] = ["budget_musd", "revenue_musd"]
+
+    presentation[columns].to_csv(path, index=False)
+
+
+
 # Local Execution
 
 
 if __name__ == "__main__":
     try:
-       raw_df = pd.read_json(RAW_JSON)
-       logger.info(f"Loaded {len(raw_df)} raw movies")
+       raw_df = load_raw_movies(RAW_JSON)
+       logger.info("Loaded %d raw movies", len(raw_df))
     except FileNotFoundError:
         logger.error("movies_raw.json not found. Run extract.py first.")
         raise
 
     transformed = transform_movies(raw_df)
-    transformed.to_csv(TRANSFORMED_CSV, index=False)
-    logger.info(f"Saved transformed movies to {TRANSFORMED_CSV}")
+    write_transformed(transformed, TRANSFORMED_PARQUET)
+    logger.info("Saved transformed movies to %s", TRANSFORMED_PARQUET)
+
+    # CSV kept for external consumers
+    write_transformed(transformed, TRANSFORMED_CSV)
+    logger.info("Saved transformed movies to %s", TRANSFORMED_CSV)
     
\ No newline at end of file
@@ -1,8 +1,16 @@
 import os
+import hashlib
 import logging
+from pathlib import Path
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from Config.paths import VIS_LOG, LOG_DIR, TRANSFORMED_CSV
+from Config.paths import (
+    VIS_LOG, LOG_DIR, TRANSFORMED_CSV, TRANSFORMED_PARQUET, ANALYTICS_CACHE_DIR
+)
+from Transformation.storage import read_transformed_csv
+
+# matplotlib.pyplot is imported inside the plot functions, so pipeline
+# runs that never plot don't pay its import cost
 
 
 # LOGGING 
@@ -25,51 +33,120 @@ logger.propagate = False
 logger.info("Logger initialized successfully")
 
 
-file_handler = logging.FileHandler(
-    VIS_LOG,
-    mode="w",
-    encoding="utf-8"
-)
-
-logger.info("Logger initialized successfully")
-file_handler.flush()
-
-
 
 # ANALYTICS PREPARATION
 
 def prepare_analytics(df: pd.DataFrame) -> pd.DataFrame:
     logger.info("Preparing analytics columns")
 
-    df = df.copy()
+    # Money columns are pulled out once; profit and ROI are one NumPy pass
+    budget = df["budget_musd_num"].to_numpy(dtype="float64", na_value=np.nan)
+    revenue = df["revenue_musd_num"].to_numpy(dtype="float64", na_value=np.nan)
+    profit = revenue - budget
+    roi = np.divide(
+        profit,
+        budget,
+        out=np.full_like(profit, np.nan),
+        where=budget > 0
+    )
 
-    df["budget_musd_num"] = pd.to_numeric(df["budget_musd_num"], errors="coerce")
-    df["revenue_musd_num"] = pd.to_numeric(df["revenue_musd_num"], errors="coerce")
+    # Categorical codes: 0=Standalone, 1=Franchise
+    in_collection = df["belongs_to_collection"].notna().to_numpy()
+
+    df = (
+        df.assign(
+            profit_musd=profit,
+            roi=roi,
+            release_year=pd.to_datetime(
+                df["release_date"], errors="coerce"
+            ).dt.year,
+            movie_type=pd.Categorical.from_codes(
+                in_collection.astype(np.int8),
+                categories=["Standalone", "Franchise"]
+            ),
+            genres=df["genres"].str.split("|")
+        )
+        .explode("genres", ignore_index=True)
+        # After exploding, genres holds a handful of distinct labels
+        .astype({"genres": "category"})
+    )
 
-    df["profit_musd"] = df["revenue_musd_num"] - df["budget_musd_num"]
-    df["roi"] = df["profit_musd"] / df["budget_musd_num"].where(df["budget_musd_num"] > 0)
+    logger.info("Analytics preparation completed")
 
-    df["release_year"] = pd.to_datetime(
-        df["release_date"], errors="coerce"
-    ).dt.year
+    return df
 
-    df["genres"] = df["genres"].str.split("|")
-    df = df.explode("genres")
 
+# Bump whenever prepare_analytics changes its output, so cached frames
+# written by older code are rebuilt instead of served
+ANALYTICS_VERSION = 2
+
+
+def load_analytics(path) -> pd.DataFrame:
+    # Load transformed data from `path` and return it prepared for plotting.
+    # The prepared frame is cached as Feather, named <source>-<key>.feather:
+    # <source> hashes the file's path, <key> its mtime and size plus
+    # ANALYTICS_VERSION, so notebook reruns skip the preparation work.
+    path = Path(path)
+    stat = path.stat()
+    source = hashlib.md5(str(path.resolve()).encode()).hexdigest()[:12]
+    key = hashlib.md5(
+        f"{ANALYTICS_VERSION}:{stat.st_mtime_ns}:{stat.st_size}".encode()
+    ).hexdigest()[:16]
+    cache_path = ANALYTICS_CACHE_DIR / f"{source}-{key}.feather"
+
+    if cache_path.exists():
+        try:
+            df_cached = pd.read_feather(cache_path)
+        except Exception as e:
+            logger.warning("Ignoring unreadable cache %s: %s", cache_path, e)
+        else:
+            logger.info("Loading prepared analytics from cache %s", cache_path)
+            return df_cached
+
+    if path.suffix == ".parquet":
+        df = pd.read_parquet(path, engine="pyarrow")
+    else:
+        df = read_transformed_csv(path)
+
+    df_analytics = prepare_analytics(df)
+
+    # Write to a temp file and rename, so an interrupted run never leaves a
+    # half-written cache behind; then drop older entries for this source
+    ANALYTICS_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+    df_analytics.to_feather(tmp_path)
+    tmp_path.replace(cache_path)
+    logger.info("Cached prepared analytics to %s", cache_path)
+
+    for stale in ANALYTICS_CACHE_DIR.glob(f"{source}-*.feather"):
+        if stale != cache_path:
+            stale.unlink(missing_ok=True)
+            logger.info("Removed stale analytics cache %s", stale)
+
+    return df_analytics
 
-    df["movie_type"] = df["belongs_to_collection"].apply(
-        lambda x: "Franchise" if pd.notna(x) else "Standalone"
-    )
 
-    logger.info("Analytics preparation completed")
-    file_handler.flush()
+# VISUALIZATIONS 
 
-    return df
+def show_or_save(fig, name: str, output_dir=None) -> None:
+    # Interactive runs (notebook) show the figure; headless runs pass an
+    # output_dir and get <name>.png written and the figure closed.
+    import matplotlib.pyplot as plt
 
+    if output_dir is None:
+        plt.show()
+        return
 
-# VISUALIZATIONS 
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    fig.savefig(output_dir / f"{name}.png")
+    plt.close(fig)
+    logger.info("Saved figure %s", output_dir / f"{name}.png")
+
+
+def plot_revenue_vs_budget(df: pd.DataFrame, output_dir=None):
+    import matplotlib.pyplot as plt
 
-def plot_revenue_vs_budget(df: pd.DataFrame):
     logger.info("Plotting Revenue vs Budget (Franchise vs Standalone)")
 
     plt.figure(figsize=(12, 7))
@@ -116,16 +193,18 @@ def plot_revenue_vs_budget(df: pd.DataFrame):
     plt.title("Revenue vs Budget (Franchise vs Standalone)")
     plt.legend()
 
-    plt.show()
+    show_or_save(plt.gcf(), "revenue_vs_budget", output_dir)
 
 
 
-def plot_avg_roi_by_genre(df: pd.DataFrame):
+def plot_avg_roi_by_genre(df: pd.DataFrame, output_dir=None):
+    import matplotlib.pyplot as plt
+
     logger.info("Plotting Average ROI by Genre")
 
     genre_roi = (
         df[df["budget_musd_num"] > 0]
-        .groupby("genres")["roi"]
+        .groupby("genres", observed=True)["roi"]
         .mean()
         .sort_values(ascending=False)
     )
@@ -140,11 +219,13 @@ def plot_avg_roi_by_genre(df: pd.DataFrame):
     plt.ylabel("Average ROI")
     plt.title("Average ROI by Genre")
     plt.xticks(rotation=45, ha="right")
-    plt.show()
+    show_or_save(plt.gcf(), "avg_roi_by_genre", output_dir)
+
 
 
+def plot_popularity_vs_rating(df: pd.DataFrame, output_dir=None):
+    import matplotlib.pyplot as plt
 
-def plot_popularity_vs_rating(df: pd.DataFrame):
     logger.info("Plotting Popularity vs Rating")
 
     plt.figure(figsize=(10, 6))
@@ -171,12 +252,12 @@ def plot_popularity_vs_rating(df: pd.DataFrame):
     plt.title("Popularity vs Rating")
 
     plt.legend()
-    plt.show()
+    show_or_save(plt.gcf(), "popularity_vs_rating", output_dir)
 
-    file_handler.flush()
 
+def plot_yearly_revenue_trend(df: pd.DataFrame, output_dir=None):
+    import matplotlib.pyplot as plt
 
-def plot_yearly_revenue_trend(df: pd.DataFrame):
     logger.info("Plotting Yearly Revenue Trend")
 
     yearly = (
@@ -208,25 +289,42 @@ def plot_yearly_revenue_trend(df: pd.DataFrame):
     plt.title("Yearly Average Box Office Revenue")
 
     plt.legend()
-    plt.show()
+    show_or_save(plt.gcf(), "yearly_revenue_trend", output_dir)
 
-    file_handler.flush()
 
 
+def plot_franchise_vs_standalone(df: pd.DataFrame, output_dir=None):
+    import matplotlib.pyplot as plt
 
-def plot_franchise_vs_standalone(df: pd.DataFrame):
     logger.info("Plotting Franchise vs Standalone (Multiple Metrics)")
 
-    # Aggregate metrics
-    metrics = df.groupby("movie_type").agg(
-        avg_revenue=("revenue_musd_num", "mean"),
-        avg_roi=("roi", "mean"),
-        avg_rating=("vote_average", "mean"),
-        avg_popularity=("popularity", "mean")
-    )
+    # Aggregate metrics: only two groups, so NaN-aware means over a boolean
+    # mask replace the groupby machinery
+    metric_columns = {
+        "avg_revenue": "revenue_musd_num",
+        "avg_roi": "roi",
+        "avg_rating": "vote_average",
+        "avg_popularity": "popularity"
+    }
 
-    # Ensure fixed order
-    metrics = metrics.loc[["Standalone", "Franchise"]]
+    is_franchise = (df["movie_type"] == "Franchise").to_numpy()
+
+    # An empty or all-NaN group means NaN (as groupby gave), without
+    # nanmean's "Mean of empty slice" warning
+    def group_means(values):
+        return [
+            np.nan if np.isnan(group).all() else np.nanmean(group)
+            for group in (values[~is_franchise], values[is_franchise])
+        ]
+
+    # Fixed order: Standalone, Franchise
+    metrics = pd.DataFrame(
+        {
+            name: group_means(df[col].to_numpy(dtype="float64", na_value=np.nan))
+            for name, col in metric_columns.items()
+        },
+        index=["Standalone", "Franchise"]
+    )
 
     categories = metrics.index.tolist()
     x = range(len(categories))
@@ -293,34 +391,36 @@ def plot_franchise_vs_standalone(df: pd.DataFrame):
 
     fig.suptitle("Franchise vs Standalone Comparison", fontsize=16)
     plt.tight_layout(rect=[0, 0.05, 1, 0.95])
-    plt.show()
-
-    file_handler.flush()
+    show_or_save(plt.gcf(), "franchise_vs_standalone", output_dir)
 
 
 
 # RUNNER
 
-def run_all_visualizations(df: pd.DataFrame):
+def run_all_visualizations(df: pd.DataFrame, output_dir=None):
     logger.info("Starting visualization pipeline")
 
-    df_analytics = prepare_analytics(df) 
+    # Accept frames that were already prepared (e.g. from load_analytics)
+    if "movie_type" in df.columns:
+        df_analytics = df
+    else:
+        df_analytics = prepare_analytics(df)
 
-    plot_revenue_vs_budget(df_analytics)
-    plot_avg_roi_by_genre(df_analytics)
-    plot_popularity_vs_rating(df_analytics)
-    plot_yearly_revenue_trend(df_analytics)
-    plot_franchise_vs_standalone(df_analytics)
+    plot_revenue_vs_budget(df_analytics, output_dir)
+    plot_avg_roi_by_genre(df_analytics, output_dir)
+    plot_popularity_vs_rating(df_analytics, output_dir)
+    plot_yearly_revenue_trend(df_analytics, output_dir)
+    plot_franchise_vs_standalone(df_analytics, output_dir)
 
     logger.info("All visualizations completed")
 
 
-# if __name__ == "__main__":
-    
+if __name__ == "__main__":
+    source = TRANSFORMED_PARQUET if TRANSFORMED_PARQUET.exists() else TRANSFORMED_CSV
 
-#     try:
-#         df = pd.read_csv(TRANSFORMED_CSV)
-#         logger.info("Loaded transformed data")
-#         run_all_visualizations(df)
-#     except FileNotFoundError:
-#         logger.error("Transformed CSV not found")
+    try:
+        df = load_analytics(source)
+        logger.info("Loaded transformed data")
+        run_all_visualizations(df)
+    except FileNotFoundError:
+        logger.error("Transformed data not found")
@@ -1,16 +1,29 @@
-from Extraction.extract import fetch_movies, MOVIE_IDS
-from Transformation.transform import transform_movies
+from Extraction.extract import fetch_movies, save_raw_movies, MOVIE_IDS
+from Transformation.transform import transform_movies, write_transformed
 from KPI.kpis import compute_all_kpis
 from Visualization.visualize import prepare_analytics, run_all_visualizations
 
 from Config.paths import (
     RAW_JSON,
     TRANSFORMED_CSV,
-    KPI_CSV
+    TRANSFORMED_PARQUET,
+    KPI_CSV,
+    KPI_PARQUET,
+    FIGURES_DIR
 )
 
 import logging
 
+import pandas as pd
+
+
+# ---------------- PANDAS ----------------
+
+# Copy-on-Write lets assign()/explode() share unchanged column buffers
+# instead of copying them; pandas >= 3 always behaves this way
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
 
 # ---------------- LOGGING ----------------
 
@@ -30,28 +43,36 @@ def main():
     # -------- EXTRACT --------
     logger.info("Starting extraction step")
     raw_movies = fetch_movies(MOVIE_IDS)
-    raw_movies.to_json(RAW_JSON, orient="records", lines=True)
+    save_raw_movies(raw_movies, RAW_JSON)
     logger.info(f"Fetched {len(raw_movies)} movies")
 
     # -------- TRANSFORM --------
     logger.info("Starting transformation step")
     transformed_df = transform_movies(raw_movies)
-    transformed_df.to_csv(TRANSFORMED_CSV, index=False)
-    logger.info(f"Transformed data saved to {TRANSFORMED_CSV}")
+    write_transformed(transformed_df, TRANSFORMED_PARQUET)
+    write_transformed(transformed_df, TRANSFORMED_CSV)
+    logger.info(
+        "Transformed data saved to %s and %s", TRANSFORMED_PARQUET, TRANSFORMED_CSV
+    )
 
     # -------- KPI --------
     logger.info("Starting KPI computation")
     kpi_df = compute_all_kpis(transformed_df)
+    kpi_df.to_parquet(KPI_PARQUET, engine="pyarrow", index=False)
     kpi_df.to_csv(KPI_CSV, index=False)
-    logger.info(f"KPI results saved to {KPI_CSV}")
+    logger.info("KPI results saved to %s and %s", KPI_PARQUET, KPI_CSV)
 
     # -------- ANALYTICS --------
     logger.info("Preparing analytics dataset")
     analytics_df = prepare_analytics(transformed_df)
 
     # -------- VISUALIZATION --------
+    # Headless: render with Agg (no GUI backend) and save figures to disk
     logger.info("Running visualizations")
-    run_all_visualizations(analytics_df)
+    import matplotlib  # local: keeps the plotting stack off the ETL path
+    matplotlib.use("Agg")
+    run_all_visualizations(analytics_df, FIGURES_DIR)
+    logger.info("Figures saved to %s", FIGURES_DIR)
 
     logger.info("TMDB pipeline finished successfully")
 